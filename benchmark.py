@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Frame-time benchmarks for the plane simulator.
+
+Renders the world into an offscreen surface, the same way main() does,
+without a window or frame limiter.
+"""
+
+import tempfile
+import time
+
+import pygame
+
+from plane_simulator import (CHUNK_SIZE, COLORS, Environment, FrameCapture, Plane,
+                             RuntimeMetrics)
+
+FRAMES = 240
+
+def render_frame(surface, environment, plane):
+    surface.fill(COLORS['sky'])
+    environment.draw(surface,
+                     int(plane.world_x - surface.get_width()//2),
+                     int(plane.world_y - surface.get_height()//2))
+    plane.draw(surface, plane.world_x, plane.world_y)
+
+def fly(surface, environment, plane, frames, after_frame=None, fps=0):
+    # Fly a fixed course and return the mean main-thread frame time in ms
+    clock = pygame.time.Clock()
+    busy = 0.0
+    plane.world_x = plane.world_y = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        plane.world_x += 4.0
+        plane.world_y += 1.0
+        render_frame(surface, environment, plane)
+        if after_frame is not None:
+            after_frame(surface)
+        busy += time.perf_counter() - start
+        if fps:
+            clock.tick(fps)
+    return busy * 1000 / frames
+
+def bench_capture(size=(800, 600), frames=FRAMES):
+    surface = pygame.Surface(size)
+    environment = Environment()
+    plane = Plane()
+
+    # Warm up so chunk generation is not part of either measurement
+    fly(surface, environment, plane, frames)
+    baseline = fly(surface, environment, plane, frames)
+
+    # Unthrottled runs show the main-thread cost, runs paced like main()
+    # show whether the encoder keeps up
+    print(f"capture {size[0]}x{size[1]}, {frames} frames")
+    print(f"  {'no capture:':22} {baseline:7.3f} ms/frame")
+    for fmt in ('raw', 'png'):
+        for fps in (0, 60):
+            with tempfile.TemporaryDirectory() as output_dir:
+                capture = FrameCapture(size, output_dir=output_dir, fmt=fmt)
+                capture.start()
+                frame_time = fly(surface, environment, plane, frames, capture.capture, fps)
+                capture.stop()
+            label = f"{fmt} capture{f' @ {fps} FPS' if fps else ''}:"
+            print(f"  {label:22} {frame_time:7.3f} ms/frame "
+                  f"(+{frame_time - baseline:.3f} ms, {capture.frames_written} written, "
+                  f"{capture.frames_dropped} dropped)")
+
+def bench_metrics(calls=100000):
+    # Per-event recording cost of the always-on runtime metrics
+    runtime_metrics = RuntimeMetrics()
+    start = time.perf_counter()
+    for _ in range(calls):
+        runtime_metrics.observe_frame(0.016)
+    frame_cost = (time.perf_counter() - start) * 1e6 / calls
+    start = time.perf_counter()
+    for _ in range(calls):
+        runtime_metrics.chunk_generation.observe(0.004)
+    histogram_cost = (time.perf_counter() - start) * 1e6 / calls
+
+    environment = Environment()
+    runtime_metrics.prometheus_text(environment)  # First call pays numpy's import costs
+    start = time.perf_counter()
+    runtime_metrics.prometheus_text(environment)
+    scrape_cost = (time.perf_counter() - start) * 1000
+
+    print("metrics")
+    print(f"  observe_frame:     {frame_cost:7.3f} us/call")
+    print(f"  histogram observe: {histogram_cost:7.3f} us/call")
+    print(f"  prometheus scrape: {scrape_cost:7.3f} ms")
+
+def bench_tile_edits(edits=64, rounds=50):
+    # Patching edited tiles versus throwing the chunk surface away
+    environment = Environment()
+    chunk = environment.get_chunk(0, 0)
+    chunk.render_chunk()
+    tiles = [(x % CHUNK_SIZE, (x * 7) % CHUNK_SIZE, 'water') for x in range(edits)]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        environment.set_tiles(tiles)
+        environment.flush_tile_edits()
+    patch_cost = (time.perf_counter() - start) * 1000 / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        environment.set_tiles(tiles)
+        environment.dirty_tiles.clear()
+        chunk.surface = None
+        chunk.render_chunk()
+    redraw_cost = (time.perf_counter() - start) * 1000 / rounds
+
+    print(f"tile edits ({edits} tiles in one chunk)")
+    print(f"  patch:       {patch_cost:7.3f} ms")
+    print(f"  full redraw: {redraw_cost:7.3f} ms")
+
+def bench_compositing(frames=FRAMES // 2):
+    # Full-resolution chunk surfaces versus one pixel per tile plus upscale
+    print("terrain compositing")
+    for size in [(800, 600), (1920, 1080), (3840, 2160)]:
+        surface = pygame.Surface(size)
+        plane = Plane()
+        results = []
+        for tile_compositing in (False, True):
+            environment = Environment()
+            environment.tile_compositing = tile_compositing
+            fly(surface, environment, plane, frames)  # Warm the chunk caches
+            frame_time = fly(surface, environment, plane, frames)
+            cached = sum(cached_surface.get_pitch() * cached_surface.get_height()
+                         for chunk in environment.chunks.values()
+                         for cached_surface in (chunk.surface, chunk.tile_surface)
+                         if cached_surface is not None)
+            results.append((frame_time, cached))
+        (chunks, chunks_cached), (tiles, tiles_cached) = results
+        print(f"  {size[0]}x{size[1]}: chunks {chunks:7.3f} ms/frame "
+              f"({chunks_cached // 1024} KiB cached), "
+              f"tiles {tiles:7.3f} ms/frame ({tiles_cached // 1024} KiB cached), "
+              f"{chunks / tiles:.1f}x")
+
+def main():
+    bench_capture()
+    bench_metrics()
+    bench_tile_edits()
+    bench_compositing()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 os.environ['SDL_VIDEODRIVER'] = 'cocoa'  # Ensure proper video driver for macOS
 
 import pygame
@@ -9,6 +10,18 @@ import numpy as np
 import random
 import noise  # For improved terrain generation
 import colorsys
+import heapq
+import queue
+import time
+import json
+import logging
+import resource
+from bisect import bisect_left
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from threading import Thread
 
 # Initialize Pygame with double buffering
 pygame.init()
@@ -34,25 +47,237 @@ COLORS = {
     'dense_tree': [(0, 75, 0), (0, 65, 0), (0, 55, 0)],
     'water': [(30, 144, 255), (25, 130, 230), (20, 120, 210)],
     'beach': [(238, 214, 175), (230, 206, 168), (222, 198, 160)],
-    'runway': [(169, 169, 169), (160, 160, 160), (150, 150, 150)]
+    'runway': [(169, 169, 169), (160, 160, 160), (150, 150, 150)],
+    'town': (178, 34, 34),
+    'airfield': (120, 120, 120),
+    'landmark': (255, 215, 0),
+    'obstacle': (90, 60, 40),
+    'route': (255, 255, 255)
 }
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("Top-Down Plane Simulator")
+# World features: minimum spacing in tiles and the chance that a sample cell
+# holds a candidate. Spacing also sets the sample cell size, so a candidate
+# only competes with the candidates of its 3x3 neighbouring cells.
+FEATURE_TYPES = {
+    'town': (96, 0.6),
+    'airfield': (160, 0.5),
+    'landmark': (48, 0.4),
+    'obstacle': (12, 0.3),
+}
+FEATURE_INDEX_CELL = CHUNK_SIZE  # Spatial hash cell size in tiles
+
+# Autopilot cost of flying over each tile at low altitude; None is avoided
+LOW_ALTITUDE_COSTS = {
+    'grass': 1.0,
+    'beach': 1.0,
+    'runway': 1.0,
+    'tree': 2.0,
+    'dense_tree': None,
+    'water': None,
+}
+NEIGHBOUR_STEPS = [(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+                   (1, 1, 1.4142), (1, -1, 1.4142), (-1, 1, 1.4142), (-1, -1, 1.4142)]
+# For each flat chunk index x * CHUNK_SIZE + y, its in-chunk neighbours and step lengths
+CHUNK_NEIGHBOURS = [[((x + dx) * CHUNK_SIZE + y + dy, step)
+                     for dx, dy, step in NEIGHBOUR_STEPS
+                     if 0 <= x + dx < CHUNK_SIZE and 0 <= y + dy < CHUNK_SIZE]
+                    for x in range(CHUNK_SIZE) for y in range(CHUNK_SIZE)]
+# Flat tile indices along each chunk edge, keyed by the edge they lie on:
+# 'V' edges run between horizontally adjacent chunks, 'H' edges between
+# vertically adjacent ones, and both are keyed by the chunk east/south of them
+CHUNK_EDGES = [
+    ('V', 0, 0, list(range(CHUNK_SIZE))),
+    ('V', 1, 0, [(CHUNK_SIZE - 1) * CHUNK_SIZE + y for y in range(CHUNK_SIZE)]),
+    ('H', 0, 0, [x * CHUNK_SIZE for x in range(CHUNK_SIZE)]),
+    ('H', 0, 1, [x * CHUNK_SIZE + CHUNK_SIZE - 1 for x in range(CHUNK_SIZE)]),
+]
+
+# Terrain tile types, indexed for compact numpy tile arrays
+TILE_TYPES = ('grass', 'tree', 'dense_tree', 'water', 'beach', 'runway')
+TILE_INDEX = {tile_type: index for index, tile_type in enumerate(TILE_TYPES)}
+# Tiles the low-altitude autopilot can fly over, indexed like tile arrays
+PASSABLE_TILES = np.array([LOW_ALTITUDE_COSTS[tile_type] is not None for tile_type in TILE_TYPES])
+
+# The display is created in main() so the module can be imported by
+# analysis workers and benchmarks without opening a window
+screen = None
 clock = pygame.time.Clock()
 
 # Fullscreen state
 is_fullscreen = False
 
+# Upper bounds in seconds for chunk generation and render latency histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def snapshot(self):
+        # Cumulative bucket counts keyed by their Prometheus 'le' label
+        cumulative = []
+        total = 0
+        for bound, count in zip([repr(b) for b in self.buckets] + ['+Inf'], self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+class RuntimeMetrics:
+    """Always-on counters for simulator health.
+
+    Recording only touches a few numbers per event; everything expensive
+    (walking the chunk cache, percentiles, RSS) happens when a snapshot is
+    taken by the exporter.
+    """
+    def __init__(self, frame_window=600):
+        self.chunk_generation = Histogram()
+        self.chunk_render = Histogram()
+        self.frame_times = np.zeros(frame_window)  # Ring buffer of recent frames
+        self.frame_count = 0
+        self.frame_time_sum = 0.0
+    
+    def observe_frame(self, seconds):
+        self.frame_times[self.frame_count % len(self.frame_times)] = seconds
+        self.frame_count += 1
+        self.frame_time_sum += seconds
+    
+    def snapshot(self, environment):
+        # Copy before walking, the main thread keeps loading chunks meanwhile
+        chunks = list(environment.chunks.values())
+        surfaces = [surface for chunk in chunks
+                    for surface in (chunk.surface, chunk.tile_surface) if surface is not None]
+        recent = self.frame_times[:min(self.frame_count, len(self.frame_times))].copy()
+        quantiles = (0.5, 0.9, 0.99)
+        percentiles = np.percentile(recent, [q * 100 for q in quantiles]) if len(recent) else [0.0] * 3
+        
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        max_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+        
+        return {
+            'loaded_chunks': len(chunks),
+            'cached_surfaces': len(surfaces),
+            'cached_surface_bytes': sum(surface.get_pitch() * surface.get_height()
+                                        for surface in surfaces),
+            'chunk_generation_seconds': self.chunk_generation.snapshot(),
+            'chunk_render_seconds': self.chunk_render.snapshot(),
+            'frame_time_seconds': {
+                'quantiles': list(zip(quantiles, (float(p) for p in percentiles))),
+                'sum': self.frame_time_sum,
+                'count': self.frame_count,
+            },
+            'resident_memory_bytes': current_rss(),
+            'max_resident_memory_bytes': max_rss,
+        }
+    
+    def prometheus_text(self, environment):
+        stats = self.snapshot(environment)
+        lines = []
+        
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        metric('plane_loaded_chunks', 'gauge', 'Chunks held in Environment.chunks.')
+        lines.append(f"plane_loaded_chunks {stats['loaded_chunks']}")
+        metric('plane_cached_surfaces', 'gauge', 'Rendered chunk surfaces held in the cache.')
+        lines.append(f"plane_cached_surfaces {stats['cached_surfaces']}")
+        metric('plane_cached_surface_bytes', 'gauge', 'Pixel memory of cached chunk surfaces.')
+        lines.append(f"plane_cached_surface_bytes {stats['cached_surface_bytes']}")
+        
+        for name, help_text in (('chunk_generation_seconds', 'Time to generate a terrain chunk.'),
+                                ('chunk_render_seconds', 'Time to render a chunk surface.')):
+            histogram = stats[name]
+            metric(f'plane_{name}', 'histogram', help_text)
+            for bound, count in histogram['buckets']:
+                lines.append(f'plane_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"plane_{name}_sum {histogram['sum']!r}")
+            lines.append(f"plane_{name}_count {histogram['count']}")
+        
+        frame_times = stats['frame_time_seconds']
+        metric('plane_frame_time_seconds', 'summary', 'Frame time over the recent frame window.')
+        for quantile, value in frame_times['quantiles']:
+            lines.append(f'plane_frame_time_seconds{{quantile="{quantile}"}} {value!r}')
+        lines.append(f"plane_frame_time_seconds_sum {frame_times['sum']!r}")
+        lines.append(f"plane_frame_time_seconds_count {frame_times['count']}")
+        
+        if stats['resident_memory_bytes'] is not None:
+            metric('process_resident_memory_bytes', 'gauge', 'Resident memory size in bytes.')
+            lines.append(f"process_resident_memory_bytes {stats['resident_memory_bytes']}")
+        metric('process_max_resident_memory_bytes', 'gauge', 'Peak resident memory size in bytes.')
+        lines.append(f"process_max_resident_memory_bytes {stats['max_resident_memory_bytes']}")
+        return "\n".join(lines) + "\n"
+
+def current_rss():
+    # Current RSS is only cheaply available through /proc; None elsewhere
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def serve_metrics(environment, port, host='127.0.0.1'):
+    """Serve metrics in Prometheus text format on a background thread."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text(environment).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of the game's console output
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def log_metrics(environment, path, interval=10.0, max_bytes=1024 * 1024, backup_count=3):
+    """Append a JSON metrics snapshot to a rotating stats file every interval."""
+    logger = logging.getLogger('plane_simulator.metrics')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count))
+    
+    def write_snapshots():
+        while True:
+            stats = metrics.snapshot(environment)
+            stats['time'] = time.time()
+            logger.info(json.dumps(stats))
+            time.sleep(interval)
+    
+    Thread(target=write_snapshots, daemon=True).start()
+
+metrics = RuntimeMetrics()
+
+def terrain_elevation(world_x, world_y):
+    return noise.pnoise2(world_x * 0.05, world_y * 0.05, octaves=6, persistence=0.5)
+
 class TerrainChunk:
     def __init__(self, chunk_x, chunk_y):
         self.chunk_x = chunk_x
         self.chunk_y = chunk_y
         self.tiles = {}  # Dictionary to store tile types
         self.features = []  # List to store special features
+        self.river_tiles = set()  # Tiles carved out by generate_river
         self.surface = None  # Cache the rendered chunk
+        self.tile_surface = None  # Cache of the chunk at one pixel per tile
+        start = time.perf_counter()
         self.generate()
+        metrics.chunk_generation.observe(time.perf_counter() - start)
     
     def generate(self):
         # Use noise to generate base terrain
@@ -62,7 +287,7 @@ class TerrainChunk:
                 world_y = self.chunk_y * CHUNK_SIZE + y
                 
                 # Generate different noise layers
-                elevation = noise.pnoise2(world_x * 0.05, world_y * 0.05, octaves=6, persistence=0.5)
+                elevation = terrain_elevation(world_x, world_y)
                 moisture = noise.pnoise2(world_x * 0.03, world_y * 0.03, octaves=4, persistence=0.5)
                 forest = noise.pnoise2(world_x * 0.08, world_y * 0.08, octaves=3, persistence=0.7)
                 
@@ -133,18 +358,45 @@ class TerrainChunk:
             current_y += direction[1]
             
             river_points.append((current_x, current_y))
-            
-            # Add river tiles
-            for px, py in river_points:
-                self.tiles[(px, py)] = ('water', random.choice(COLORS['water']))
-                # Add beach tiles around river
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    beach_x, beach_y = px + dx, py + dy
-                    if (beach_x, beach_y) in self.tiles and self.tiles[(beach_x, beach_y)][0] == 'grass':
-                        self.tiles[(beach_x, beach_y)] = ('beach', random.choice(COLORS['beach']))
+        
+        # Add river tiles once the whole path is known
+        self.river_tiles.update(river_points)
+        for px, py in river_points:
+            self.tiles[(px, py)] = ('water', random.choice(COLORS['water']))
+            # Add beach tiles around river
+            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                beach_x, beach_y = px + dx, py + dy
+                if (beach_x, beach_y) in self.tiles and self.tiles[(beach_x, beach_y)][0] == 'grass':
+                    self.tiles[(beach_x, beach_y)] = ('beach', random.choice(COLORS['beach']))
+
+    def patch_tiles(self, tiles):
+        # Redraw only the given tiles of the cached surfaces; a surface that
+        # is not cached yet will include the edits when it is rendered
+        for tile_x, tile_y in tiles:
+            tile_type, color = self.tiles[(tile_x, tile_y)]
+            if self.surface is not None:
+                self.surface.fill(color, (tile_x * TILE_SIZE, tile_y * TILE_SIZE,
+                                          TILE_SIZE, TILE_SIZE))
+            if self.tile_surface is not None:
+                self.tile_surface.set_at((tile_x, tile_y), color)
+    
+    def tile_array(self):
+        # Compact [x, y] array of TILE_INDEX values, no pygame surface involved
+        tiles = np.empty((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        for (tile_x, tile_y), (tile_type, color) in self.tiles.items():
+            tiles[tile_x, tile_y] = TILE_INDEX[tile_type]
+        return tiles
+    
+    def river_mask(self):
+        # Boolean [x, y] array marking tiles carved out by generate_river
+        river = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=bool)
+        for tile_x, tile_y in self.river_tiles:
+            river[tile_x, tile_y] = True
+        return river
 
     def render_chunk(self):
         if self.surface is None:
+            start = time.perf_counter()
             chunk_pixel_size = CHUNK_SIZE * TILE_SIZE
             self.surface = pygame.Surface((chunk_pixel_size, chunk_pixel_size))
             
@@ -152,12 +404,376 @@ class TerrainChunk:
                 pygame.draw.rect(self.surface, color,
                                (tile_x * TILE_SIZE, tile_y * TILE_SIZE,
                                 TILE_SIZE, TILE_SIZE))
+            metrics.chunk_render.observe(time.perf_counter() - start)
         
         return self.surface
+    
+    def render_tiles(self):
+        if self.tile_surface is None:
+            start = time.perf_counter()
+            colors = np.empty((CHUNK_SIZE, CHUNK_SIZE, 3), dtype=np.uint8)
+            for (tile_x, tile_y), (tile_type, color) in self.tiles.items():
+                colors[tile_x, tile_y] = color
+            self.tile_surface = pygame.surfarray.make_surface(colors)
+            metrics.chunk_render.observe(time.perf_counter() - start)
+        
+        return self.tile_surface
+
+class Feature:
+    def __init__(self, kind, world_x, world_y):
+        self.kind = kind
+        self.world_x = world_x  # World tile coordinates
+        self.world_y = world_y
+    
+    def draw(self, surface, screen_x, screen_y):
+        color = COLORS[self.kind]
+        if self.kind == 'town':
+            # A small block of houses
+            for dx, dy in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+                pygame.draw.rect(surface, color,
+                               (screen_x + dx * TILE_SIZE + 2, screen_y + dy * TILE_SIZE + 2,
+                                TILE_SIZE - 4, TILE_SIZE - 4))
+        elif self.kind == 'airfield':
+            pygame.draw.rect(surface, color, (screen_x, screen_y, TILE_SIZE * 2, TILE_SIZE * 8))
+        elif self.kind == 'landmark':
+            center = (screen_x + TILE_SIZE // 2, screen_y + TILE_SIZE // 2)
+            pygame.draw.circle(surface, color, center, TILE_SIZE // 2)
+        else:
+            pygame.draw.rect(surface, color, (screen_x + 4, screen_y + 4,
+                                              TILE_SIZE - 8, TILE_SIZE - 8))
+
+@lru_cache(maxsize=16384)
+def _feature_candidate(kind, cell_x, cell_y):
+    """Return (world_x, world_y, priority) for a sample cell, or None.
+
+    Derived only from the cell coordinates, so every chunk sees the same
+    candidates no matter which chunks are loaded or in which order.
+    """
+    spacing, density = FEATURE_TYPES[kind]
+    rng = random.Random(hash((list(FEATURE_TYPES).index(kind), cell_x, cell_y)))
+    if rng.random() >= density:
+        return None
+    world_x = cell_x * spacing + rng.randrange(spacing)
+    world_y = cell_y * spacing + rng.randrange(spacing)
+    if terrain_elevation(world_x, world_y) < -0.2:  # No features on open water
+        return None
+    return world_x, world_y, rng.random()
+
+def _feature_accepted(kind, cell_x, cell_y):
+    # Poisson-disk style dart throwing: a candidate survives when no
+    # higher-priority candidate lies closer than the minimum spacing
+    candidate = _feature_candidate(kind, cell_x, cell_y)
+    if candidate is None:
+        return None
+    world_x, world_y, priority = candidate
+    spacing = FEATURE_TYPES[kind][0]
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx == dy == 0:
+                continue
+            other = _feature_candidate(kind, cell_x + dx, cell_y + dy)
+            if (other is not None and other[2] > priority and
+                    math.hypot(other[0] - world_x, other[1] - world_y) < spacing):
+                return None
+    return Feature(kind, world_x, world_y)
+
+def generate_features(chunk_x, chunk_y):
+    """Place the features whose position falls inside a chunk."""
+    features = []
+    min_x = chunk_x * CHUNK_SIZE
+    min_y = chunk_y * CHUNK_SIZE
+    for kind, (spacing, density) in FEATURE_TYPES.items():
+        for cell_x in range(min_x // spacing, (min_x + CHUNK_SIZE - 1) // spacing + 1):
+            for cell_y in range(min_y // spacing, (min_y + CHUNK_SIZE - 1) // spacing + 1):
+                feature = _feature_accepted(kind, cell_x, cell_y)
+                if (feature is not None and
+                        min_x <= feature.world_x < min_x + CHUNK_SIZE and
+                        min_y <= feature.world_y < min_y + CHUNK_SIZE):
+                    features.append(feature)
+    return features
+
+class FeatureIndex:
+    """World-level spatial hash of loaded features.
+
+    Queries only visit the hash cells overlapping the requested area, so their
+    cost does not grow with the number of features in the world.
+    """
+    def __init__(self, cell_size=FEATURE_INDEX_CELL):
+        self.cell_size = cell_size
+        self.cells = {}
+    
+    def _cell(self, world_x, world_y):
+        return (world_x // self.cell_size, world_y // self.cell_size)
+    
+    def add(self, feature):
+        self.cells.setdefault(self._cell(feature.world_x, feature.world_y), []).append(feature)
+    
+    def remove(self, feature):
+        cell = self._cell(feature.world_x, feature.world_y)
+        bucket = self.cells.get(cell)
+        if bucket is not None and feature in bucket:
+            bucket.remove(feature)
+            if not bucket:
+                del self.cells[cell]
+    
+    def query_rect(self, min_x, min_y, max_x, max_y):
+        # Features with min <= position < max, in world tiles
+        min_cell_x, min_cell_y = self._cell(min_x, min_y)
+        max_cell_x, max_cell_y = self._cell(max_x, max_y)
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_y in range(min_cell_y, max_cell_y + 1):
+                for feature in self.cells.get((cell_x, cell_y), ()):
+                    if min_x <= feature.world_x < max_x and min_y <= feature.world_y < max_y:
+                        yield feature
+    
+    def query_radius(self, world_x, world_y, radius):
+        for feature in self.query_rect(math.floor(world_x - radius), math.floor(world_y - radius),
+                                       math.ceil(world_x + radius) + 1, math.ceil(world_y + radius) + 1):
+            if math.hypot(feature.world_x - world_x, feature.world_y - world_y) <= radius:
+                yield feature
+
+def iter_chunk_coords(center_x, center_y, radius, order='spiral'):
+    """Yield chunk coordinates in the square of chunks around a center chunk.
+
+    'spiral' walks outward ring by ring so nearby chunks come first, 'row'
+    walks the square row by row.
+    """
+    if order == 'row':
+        for chunk_y in range(center_y - radius, center_y + radius + 1):
+            for chunk_x in range(center_x - radius, center_x + radius + 1):
+                yield chunk_x, chunk_y
+    elif order == 'spiral':
+        yield center_x, center_y
+        for ring in range(1, radius + 1):
+            # Walk each ring clockwise, starting at its top-left corner
+            for chunk_x in range(center_x - ring, center_x + ring):
+                yield chunk_x, center_y - ring
+            for chunk_y in range(center_y - ring, center_y + ring):
+                yield center_x + ring, chunk_y
+            for chunk_x in range(center_x + ring, center_x - ring, -1):
+                yield chunk_x, center_y + ring
+            for chunk_y in range(center_y + ring, center_y - ring, -1):
+                yield center_x - ring, chunk_y
+    else:
+        raise ValueError(f"Unknown chunk order: {order!r}")
+
+def _label_passable(passable):
+    # Label the 8-connected passable regions of one chunk, given a flat list
+    # indexed like CHUNK_NEIGHBOURS; returns per-tile labels (-1 if blocked)
+    # and the tile count of each label
+    labels = [-1] * len(passable)
+    sizes = []
+    for index, open_tile in enumerate(passable):
+        if not open_tile or labels[index] >= 0:
+            continue
+        label = len(sizes)
+        labels[index] = label
+        stack = [index]
+        size = 0
+        while stack:
+            current = stack.pop()
+            size += 1
+            for neighbour, _ in CHUNK_NEIGHBOURS[current]:
+                if passable[neighbour] and labels[neighbour] < 0:
+                    labels[neighbour] = label
+                    stack.append(neighbour)
+        sizes.append(size)
+    return labels, sizes
+
+class RunwayConnectivity:
+    """Streaming union-find of passable terrain across chunk borders.
+
+    Each chunk's passable regions are joined to those of neighbours that were
+    already added through the tiles along their shared edge. Only edges still
+    waiting for their neighbour and the regions they touch are kept; a region
+    with no waiting edges can never grow again, so it is retired and its tiles
+    are counted if it contains the runway. Memory follows the frontier of the
+    scanned area rather than its size.
+    """
+    def __init__(self, runway_center):
+        self.runway_center = runway_center  # World tile coordinates of the runway
+        self.parent = {}  # Region id (chunk_x, chunk_y, label) -> parent id
+        self.tiles = {}  # Root -> passable tiles in the region
+        self.refs = {}  # Root -> waiting edges that touch the region
+        self.runway = set()  # Live roots whose region contains the runway
+        self.waiting = {}  # Edge key -> region id per edge tile (None if blocked)
+        self.reachable_tiles = 0  # Tiles of retired regions containing the runway
+    
+    def find(self, node):
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        self.parent[root_b] = root_a
+        self.tiles[root_a] += self.tiles.pop(root_b)
+        self.refs[root_a] += self.refs.pop(root_b)
+        if root_b in self.runway:
+            self.runway.discard(root_b)
+            self.runway.add(root_a)
+        return root_a
+    
+    def _join_edge(self, edge, other, touched, waiting=1):
+        # Both sides of an edge are known: release the references of the
+        # first `waiting` sides that were waiting on it and join tiles that
+        # touch across it, diagonals included
+        for border in (other, edge)[:waiting]:
+            for node in set(border) - {None}:
+                root = self.find(node)
+                self.refs[root] -= 1
+                touched.add(root)
+        for i, node in enumerate(edge):
+            if node is None:
+                continue
+            for j in (i - 1, i, i + 1):
+                if 0 <= j < CHUNK_SIZE and other[j] is not None:
+                    self.union(node, other[j])
+    
+    def _add_edge(self, key, edge, touched):
+        other = self.waiting.pop(key, None)
+        if other is not None:
+            self._join_edge(edge, other, touched)
+            return
+        self.waiting[key] = edge
+        for node in set(edge) - {None}:
+            self.refs[self.find(node)] += 1
+    
+    def _retire(self, touched):
+        for node in touched:
+            root = self.find(node)
+            if self.refs.get(root) == 0:
+                if root in self.runway:
+                    self.runway.discard(root)
+                    self.reachable_tiles += self.tiles[root]
+                del self.tiles[root], self.refs[root]
+        
+        # Retired regions leave their ids behind; once they outnumber the live
+        # ones, keep only ids still on a waiting edge, pointing at their roots
+        live = sum(len(edge) for edge in self.waiting.values()) + len(self.tiles)
+        if len(self.parent) > 2 * live + 4096:
+            parent = {root: root for root in self.tiles}
+            for edge in self.waiting.values():
+                for node in edge:
+                    if node is not None:
+                        parent[node] = self.find(node)
+            self.parent = parent
+    
+    def add(self, chunk_x, chunk_y, passable):
+        labels, sizes = _label_passable(passable)
+        nodes = [(chunk_x, chunk_y, label) for label in range(len(sizes))]
+        for node, size in zip(nodes, sizes):
+            self.parent[node] = node
+            self.tiles[node] = size
+            self.refs[node] = 0
+        
+        runway_x, runway_y = self.runway_center
+        if (runway_x // CHUNK_SIZE, runway_y // CHUNK_SIZE) == (chunk_x, chunk_y):
+            label = labels[(runway_x % CHUNK_SIZE) * CHUNK_SIZE + runway_y % CHUNK_SIZE]
+            if label >= 0:
+                self.runway.add(nodes[label])
+        
+        touched = set(nodes)
+        for axis, dx, dy, indices in CHUNK_EDGES:
+            edge = [nodes[labels[i]] if labels[i] >= 0 else None for i in indices]
+            self._add_edge((axis, chunk_x + dx, chunk_y + dy), edge, touched)
+        self._retire(touched)
+    
+    def merge(self, other):
+        if self.runway_center != other.runway_center:
+            raise ValueError("Cannot merge connectivity gathered around different runways")
+        # Region ids embed chunk coordinates, so stats over disjoint chunks never collide
+        self.parent.update(other.parent)
+        self.tiles.update(other.tiles)
+        self.refs.update(other.refs)
+        self.runway |= other.runway
+        self.reachable_tiles += other.reachable_tiles
+        touched = set()
+        for key, edge in other.waiting.items():
+            mine = self.waiting.pop(key, None)
+            if mine is None:
+                self.waiting[key] = edge  # Its references came along in refs
+            else:
+                self._join_edge(edge, mine, touched, waiting=2)
+        self._retire(touched)
+        return self
+    
+    def reachable(self):
+        # Regions still on the frontier count too, as far as they were scanned
+        return self.reachable_tiles + sum(self.tiles[root] for root in self.runway)
+
+class WorldStats:
+    """Aggregate of generated terrain that keeps no chunks around.
+
+    Tile counts are constant-memory; runway reachability keeps the frontier
+    of the scanned area (see RunwayConnectivity). Stats from separate workers
+    combine with merge(), so large areas can be analysed in parallel.
+    """
+    def __init__(self, runway_center):
+        self.chunks = 0
+        self.tile_counts = np.zeros(len(TILE_TYPES), dtype=np.int64)
+        self.river_tiles = 0
+        self.river_chunks = 0
+        self.runway_chunks = 0
+        self.passable_tiles = 0
+        self.connectivity = RunwayConnectivity(runway_center)
+    
+    def add(self, chunk_x, chunk_y, tiles, river):
+        self.chunks += 1
+        self.tile_counts += np.bincount(tiles.ravel(), minlength=len(TILE_TYPES))
+        
+        # Only count river tiles that are still water (the runway may cover them)
+        river_count = int(np.count_nonzero(river & (tiles == TILE_INDEX['water'])))
+        self.river_tiles += river_count
+        if river_count:
+            self.river_chunks += 1
+        if np.any(tiles == TILE_INDEX['runway']):
+            self.runway_chunks += 1
+        
+        # Reachability follows low-altitude passable tiles from the runway
+        passable = PASSABLE_TILES[tiles]
+        self.passable_tiles += int(np.count_nonzero(passable))
+        self.connectivity.add(chunk_x, chunk_y, passable.ravel().tolist())
+    
+    def merge(self, other):
+        self.connectivity.merge(other.connectivity)
+        self.chunks += other.chunks
+        self.tile_counts += other.tile_counts
+        self.river_tiles += other.river_tiles
+        self.river_chunks += other.river_chunks
+        self.runway_chunks += other.runway_chunks
+        self.passable_tiles += other.passable_tiles
+        return self
+    
+    def fraction(self, tile_type):
+        total = self.tile_counts.sum()
+        return float(self.tile_counts[TILE_INDEX[tile_type]] / total) if total else 0.0
+    
+    def summary(self):
+        total_tiles = self.chunks * CHUNK_SIZE * CHUNK_SIZE
+        result = {tile_type: self.fraction(tile_type) for tile_type in TILE_TYPES}
+        result['river'] = self.river_tiles / total_tiles if total_tiles else 0.0
+        result['river_chunks'] = self.river_chunks / self.chunks if self.chunks else 0.0
+        result['runway_chunks'] = self.runway_chunks
+        # Share of passable tiles the low-altitude autopilot could reach from the runway
+        result['runway_reachable'] = (self.connectivity.reachable() / self.passable_tiles
+                                      if self.passable_tiles else 0.0)
+        return result
 
 class Environment:
     def __init__(self):
         self.chunks = {}  # Dictionary to store loaded chunks
+        self.features = FeatureIndex()  # Features of all loaded chunks
+        self.dirty_tiles = {}  # Chunk key -> tiles edited since the last flush
+        self.tile_listeners = []  # Called with a chunk key when its tiles change or it unloads
+        self.tile_compositing = False  # Draw at one pixel per tile, then upscale
+        self.tile_view = None  # Visible tiles at one pixel per tile
+        self.wide_view = None  # tile_view stretched to TILE_SIZE horizontally
         self.runway_pos = (0, 0)  # World coordinates of runway
         self.generate_runway()
     
@@ -168,6 +784,7 @@ class Environment:
         runway_length = 20
         start_x = CHUNK_SIZE // 2 - runway_width // 2
         start_y = CHUNK_SIZE // 2 - runway_length // 2
+        self.runway_center = (start_x + runway_width // 2, start_y + runway_length // 2)
         
         for x in range(start_x, start_x + runway_width):
             for y in range(start_y, start_y + runway_length):
@@ -176,9 +793,98 @@ class Environment:
     def get_chunk(self, chunk_x, chunk_y):
         chunk_key = (chunk_x, chunk_y)
         if chunk_key not in self.chunks:
-            self.chunks[chunk_key] = TerrainChunk(chunk_x, chunk_y)
+            chunk = TerrainChunk(chunk_x, chunk_y)
+            chunk.features = generate_features(chunk_x, chunk_y)
+            for feature in chunk.features:
+                self.features.add(feature)
+            self.chunks[chunk_key] = chunk
         return self.chunks[chunk_key]
     
+    def unload_chunk(self, chunk_x, chunk_y):
+        self.dirty_tiles.pop((chunk_x, chunk_y), None)
+        chunk = self.chunks.pop((chunk_x, chunk_y), None)
+        if chunk is not None:
+            for feature in chunk.features:
+                self.features.remove(feature)
+            # A reloaded chunk is generated afresh, so derived caches are stale
+            for listener in self.tile_listeners:
+                listener(chunk_x, chunk_y)
+    
+    def set_tile(self, world_x, world_y, tile_type):
+        """Change a tile; cached surfaces are patched on the next flush."""
+        if tile_type not in TILE_INDEX:
+            raise ValueError(f"Unknown tile type: {tile_type!r}")
+        chunk_x, chunk_y = world_x // CHUNK_SIZE, world_y // CHUNK_SIZE
+        tile = (world_x % CHUNK_SIZE, world_y % CHUNK_SIZE)
+        chunk = self.get_chunk(chunk_x, chunk_y)
+        chunk.tiles[tile] = (tile_type, random.choice(COLORS[tile_type]))
+        self.dirty_tiles.setdefault((chunk_x, chunk_y), set()).add(tile)
+    
+    def set_tiles(self, edits):
+        # Batch of (world_x, world_y, tile_type) edits, checked up front so
+        # a bad entry does not leave the batch half applied
+        edits = list(edits)
+        for world_x, world_y, tile_type in edits:
+            if tile_type not in TILE_INDEX:
+                raise ValueError(f"Unknown tile type: {tile_type!r}")
+        for world_x, world_y, tile_type in edits:
+            self.set_tile(world_x, world_y, tile_type)
+    
+    def flush_tile_edits(self):
+        """Patch cached surfaces for every edit since the last flush.
+
+        Called once per frame from draw(), so any number of edits to a chunk
+        turn into a single patch of just the changed tiles.
+        """
+        dirty_tiles, self.dirty_tiles = self.dirty_tiles, {}
+        for chunk_key, tiles in dirty_tiles.items():
+            chunk = self.chunks.get(chunk_key)
+            if chunk is not None:
+                chunk.patch_tiles(tiles)
+            for listener in self.tile_listeners:
+                listener(*chunk_key)
+    
+    def features_near(self, world_x, world_y, radius):
+        # Loaded features within radius, all in world tiles
+        return list(self.features.query_radius(world_x, world_y, radius))
+    
+    def iter_chunk_tiles(self, chunk_coords):
+        """Lazily yield (chunk_x, chunk_y, tiles, river) for each coordinate.
+
+        Chunks that are not loaded are generated on the fly and dropped right
+        after, so memory stays flat and no pygame surfaces are created.
+        """
+        for chunk_x, chunk_y in chunk_coords:
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                chunk = TerrainChunk(chunk_x, chunk_y)
+            yield chunk_x, chunk_y, chunk.tile_array(), chunk.river_mask()
+    
+    def analyze_world(self, center_x=0, center_y=0, radius=8, order='spiral', workers=0):
+        """Aggregate WorldStats over the square of chunks around a center chunk.
+
+        With workers > 0 the rows of the square are split across processes,
+        each with its own Environment, and the partial stats are merged.
+        """
+        stats = WorldStats(self.runway_center)
+        if workers <= 0:
+            for chunk_x, chunk_y, tiles, river in self.iter_chunk_tiles(
+                    iter_chunk_coords(center_x, center_y, radius, order)):
+                stats.add(chunk_x, chunk_y, tiles, river)
+            return stats
+        
+        # Several bands per worker keeps the pool busy when bands vary in cost
+        first_row = center_y - radius
+        last_row = center_y + radius + 1
+        band = max(1, (last_row - first_row) // (workers * 4))
+        tasks = [(center_x - radius, center_x + radius + 1,
+                  row, min(row + band, last_row))
+                 for row in range(first_row, last_row, band)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for partial in executor.map(_analyze_chunk_rows, tasks):
+                stats.merge(partial)
+        return stats
+    
     def get_tile(self, world_x, world_y):
         chunk_x = world_x // CHUNK_SIZE
         chunk_y = world_y // CHUNK_SIZE
@@ -188,6 +894,11 @@ class Environment:
         return chunk.tiles.get((tile_x, tile_y), ('grass', random.choice(COLORS['grass'])))
     
     def draw(self, surface, camera_x, camera_y):
+        self.flush_tile_edits()
+        if self.tile_compositing:
+            self.draw_tiles(surface, camera_x, camera_y)
+            return
+        
         # Calculate visible chunks
         start_chunk_x = int(camera_x // (CHUNK_SIZE * TILE_SIZE)) - 1
         start_chunk_y = int(camera_y // (CHUNK_SIZE * TILE_SIZE)) - 1
@@ -210,6 +921,69 @@ class Environment:
                     # Render chunk to its cached surface
                     chunk_surface = chunk.render_chunk()
                     surface.blit(chunk_surface, (chunk_screen_x, chunk_screen_y))
+        
+        self.draw_features(surface, camera_x, camera_y)
+    
+    def draw_tiles(self, surface, camera_x, camera_y):
+        """Composite the visible tiles at one pixel each, then upscale.
+
+        One transform.scale stretches the view horizontally and each of its
+        rows is then repeated TILE_SIZE times with a single blits() call
+        straight into the target. That copies rows instead of scaling every
+        output pixel. The view is one tile larger than the screen on each
+        axis and the blits carry the sub-tile camera offset, so scrolling
+        stays as smooth as with full-resolution chunk surfaces.
+        """
+        first_tile_x = int(camera_x // TILE_SIZE)
+        first_tile_y = int(camera_y // TILE_SIZE)
+        view_width = surface.get_width() // TILE_SIZE + 2
+        view_height = surface.get_height() // TILE_SIZE + 2
+        if self.tile_view is None or self.tile_view.get_size() != (view_width, view_height):
+            self.tile_view = pygame.Surface((view_width, view_height), 0, surface)
+            self.wide_view = pygame.Surface((view_width * TILE_SIZE, view_height), 0, surface)
+        
+        last_tile_x = first_tile_x + view_width - 1
+        last_tile_y = first_tile_y + view_height - 1
+        for chunk_x in range(first_tile_x // CHUNK_SIZE, last_tile_x // CHUNK_SIZE + 1):
+            for chunk_y in range(first_tile_y // CHUNK_SIZE, last_tile_y // CHUNK_SIZE + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                self.tile_view.blit(chunk.render_tiles(),
+                                    (chunk_x * CHUNK_SIZE - first_tile_x,
+                                     chunk_y * CHUNK_SIZE - first_tile_y))
+        
+        pygame.transform.scale(self.tile_view, self.wide_view.get_size(), self.wide_view)
+        offset_x = int(first_tile_x * TILE_SIZE - camera_x)
+        offset_y = int(first_tile_y * TILE_SIZE - camera_y)
+        row_width = self.wide_view.get_width()
+        surface.blits([(self.wide_view, (offset_x, offset_y + row * TILE_SIZE + repeat),
+                        (0, row, row_width, 1))
+                       for row in range(view_height) for repeat in range(TILE_SIZE)],
+                      doreturn=False)
+        self.draw_features(surface, camera_x, camera_y)
+    
+    def draw_features(self, surface, camera_x, camera_y):
+        # Features are drawn over the terrain; pad the view so large
+        # features that start just off screen are not culled
+        min_x = int(camera_x // TILE_SIZE) - 8
+        min_y = int(camera_y // TILE_SIZE) - 8
+        max_x = int((camera_x + surface.get_width()) // TILE_SIZE) + 1
+        max_y = int((camera_y + surface.get_height()) // TILE_SIZE) + 1
+        for feature in self.features.query_rect(min_x, min_y, max_x, max_y):
+            feature.draw(surface,
+                         int(feature.world_x * TILE_SIZE - camera_x),
+                         int(feature.world_y * TILE_SIZE - camera_y))
+
+def _analyze_chunk_rows(task):
+    # Worker entry point for Environment.analyze_world
+    start_x, end_x, start_y, end_y = task
+    environment = Environment()
+    stats = WorldStats(environment.runway_center)
+    chunk_coords = ((chunk_x, chunk_y)
+                    for chunk_y in range(start_y, end_y)
+                    for chunk_x in range(start_x, end_x))
+    for chunk_x, chunk_y, tiles, river in environment.iter_chunk_tiles(chunk_coords):
+        stats.add(chunk_x, chunk_y, tiles, river)
+    return stats
 
 class Plane:
     def __init__(self):
@@ -257,6 +1031,527 @@ class Plane:
         # Draw a small circle in the center of the plane
         pygame.draw.circle(surface, (200, 0, 0), (screen_x, screen_y), 2)
 
+def plane_tile(plane):
+    # World tile under the plane
+    return (int(plane.world_x // TILE_SIZE), int(plane.world_y // TILE_SIZE))
+
+class _PlanBudgetExceeded(Exception):
+    pass
+
+class RoutePlanner:
+    """Hierarchical pathfinding (HPA*) over the chunk grid.
+
+    The abstract graph has one node per border portal, a run of open tiles
+    shared by two neighbouring chunks. Portal-to-portal costs inside a chunk
+    are searched once and cached per chunk. Routes are planned on that graph
+    and only refined to tiles one segment at a time. Chunks the search needs
+    are loaded through Environment.get_chunk like any other chunk. New
+    chunks and uncached portal searches are limited by chunk_budget and
+    search_budget until the caller refills them.
+    """
+    def __init__(self, environment, costs=LOW_ALTITUDE_COSTS, max_expansions=500,
+                 heuristic_weight=1.5):
+        self.environment = environment
+        self.cost_table = np.array([math.inf if costs[tile_type] is None else costs[tile_type]
+                                    for tile_type in TILE_TYPES])
+        self.min_cost = float(self.cost_table.min())
+        self.max_expansions = max_expansions  # Bounds the abstract search per plan
+        self.heuristic_weight = heuristic_weight  # > 1 trades optimality for speed
+        self.cost_grids = {}  # (chunk_x, chunk_y) -> flat tile costs, x * CHUNK_SIZE + y
+        self.borders = {}  # (chunk_x, chunk_y, side) -> [(tile, neighbour tile), ...]
+        self.chunk_portals = {}  # (chunk_x, chunk_y) -> portal tiles inside the chunk
+        self.portal_edges = {}  # portal tile -> {other portal in the chunk: cost}
+        self.chunk_budget = None  # New chunks the planner may generate, None for no limit
+        self.search_budget = None  # Uncached portal searches it may run, None for no limit
+        self.budget_exhausted = False  # Set when a search stopped for lack of budget
+        environment.tile_listeners.append(self.invalidate_chunk)
+    
+    def invalidate_chunk(self, chunk_x, chunk_y):
+        # Forget everything derived from a chunk's tiles, including the
+        # borders it shares with its neighbours
+        self.cost_grids.pop((chunk_x, chunk_y), None)
+        for key in [(chunk_x, chunk_y, 'E'), (chunk_x, chunk_y, 'S'),
+                    (chunk_x - 1, chunk_y, 'E'), (chunk_x, chunk_y - 1, 'S')]:
+            self.borders.pop(key, None)
+        for dx, dy in [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)]:
+            for portal in self.chunk_portals.pop((chunk_x + dx, chunk_y + dy), ()):
+                self.portal_edges.pop(portal, None)
+    
+    def _cost_grid(self, chunk_x, chunk_y):
+        grid = self.cost_grids.get((chunk_x, chunk_y))
+        if grid is None:
+            if (chunk_x, chunk_y) not in self.environment.chunks and self.chunk_budget is not None:
+                if self.chunk_budget <= 0:
+                    self.budget_exhausted = True
+                    raise _PlanBudgetExceeded()
+                self.chunk_budget -= 1
+            tiles = self.environment.get_chunk(chunk_x, chunk_y).tile_array()
+            grid = self.cost_table[tiles].ravel().tolist()
+            self.cost_grids[(chunk_x, chunk_y)] = grid
+        return grid
+    
+    def tile_cost(self, tile):
+        world_x, world_y = tile
+        grid = self._cost_grid(world_x // CHUNK_SIZE, world_y // CHUNK_SIZE)
+        return grid[(world_x % CHUNK_SIZE) * CHUNK_SIZE + world_y % CHUNK_SIZE]
+    
+    def _border(self, chunk_x, chunk_y, side):
+        # Portals between a chunk and its east ('E') or south ('S') neighbour
+        key = (chunk_x, chunk_y, side)
+        if key in self.borders:
+            return self.borders[key]
+        
+        inner = CHUNK_SIZE - 1
+        if side == 'E':
+            pairs = [((chunk_x * CHUNK_SIZE + inner, chunk_y * CHUNK_SIZE + i),
+                      ((chunk_x + 1) * CHUNK_SIZE, chunk_y * CHUNK_SIZE + i))
+                     for i in range(CHUNK_SIZE)]
+        else:
+            pairs = [((chunk_x * CHUNK_SIZE + i, chunk_y * CHUNK_SIZE + inner),
+                      (chunk_x * CHUNK_SIZE + i, (chunk_y + 1) * CHUNK_SIZE))
+                     for i in range(CHUNK_SIZE)]
+        
+        # Split the border into runs open on both sides; short runs get one
+        # portal in the middle, long runs one near each end
+        portals = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and all(math.isfinite(self.tile_cost(tile)) for tile in pair):
+                run.append(pair)
+                continue
+            if len(run) >= 8:
+                portals.extend([run[1], run[-2]])
+            elif run:
+                portals.append(run[len(run) // 2])
+            run = []
+        self.borders[key] = portals
+        return portals
+    
+    def _portals(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        if key not in self.chunk_portals:
+            portals = set()
+            for pair in self._border(chunk_x, chunk_y, 'E') + self._border(chunk_x, chunk_y, 'S'):
+                portals.add(pair[0])
+            for pair in self._border(chunk_x - 1, chunk_y, 'E') + self._border(chunk_x, chunk_y - 1, 'S'):
+                portals.add(pair[1])
+            self.chunk_portals[key] = list(portals)
+        return self.chunk_portals[key]
+    
+    def _links(self, tile):
+        # Portal pairs crossing from this tile into a neighbouring chunk
+        chunk_x, chunk_y = tile[0] // CHUNK_SIZE, tile[1] // CHUNK_SIZE
+        links = []
+        for key, index in [((chunk_x, chunk_y, 'E'), 0), ((chunk_x, chunk_y, 'S'), 0),
+                           ((chunk_x - 1, chunk_y, 'E'), 1), ((chunk_x, chunk_y - 1, 'S'), 1)]:
+            for pair in self._border(*key):
+                if pair[index] == tile:
+                    links.append(pair[1 - index])
+        return links
+    
+    def _search_chunk(self, source, targets, open_tiles=()):
+        """Dijkstra confined to the chunk containing source.
+
+        Returns (costs, parents) in world tiles for the reached targets, once
+        all of them are settled. Tiles in open_tiles count as passable even
+        if their terrain is not, so the plane can always leave its own tile
+        and reach the goal tile.
+        """
+        chunk_x, chunk_y = source[0] // CHUNK_SIZE, source[1] // CHUNK_SIZE
+        min_x, min_y = chunk_x * CHUNK_SIZE, chunk_y * CHUNK_SIZE
+        
+        # Work on flat local indices, this is the planner's inner loop
+        def local(tile):
+            x, y = tile[0] - min_x, tile[1] - min_y
+            return x * CHUNK_SIZE + y if 0 <= x < CHUNK_SIZE and 0 <= y < CHUNK_SIZE else None
+        
+        def world(index):
+            return (min_x + index // CHUNK_SIZE, min_y + index % CHUNK_SIZE)
+        
+        # Private copy of the costs with the open tiles made passable
+        grid = list(self._cost_grid(chunk_x, chunk_y))
+        for tile in open_tiles:
+            index = local(tile)
+            if index is not None:
+                grid[index] = 1.0
+        remaining = {local(tile) for tile in targets} - {None}
+        start = local(source)
+        costs = [math.inf] * (CHUNK_SIZE * CHUNK_SIZE)
+        costs[start] = 0.0
+        parents = {start: None}
+        heap = [(0.0, start)]
+        while heap and remaining:
+            cost, index = heapq.heappop(heap)
+            if cost > costs[index]:
+                continue
+            remaining.discard(index)
+            for next_index, step in CHUNK_NEIGHBOURS[index]:
+                next_cost = cost + grid[next_index] * step
+                if next_cost < costs[next_index]:
+                    costs[next_index] = next_cost
+                    parents[next_index] = index
+                    heapq.heappush(heap, (next_cost, next_index))
+        
+        target_costs = {}
+        target_parents = {}
+        for tile in targets:
+            index = local(tile)
+            if index is not None and costs[index] < math.inf:
+                target_costs[tile] = costs[index]
+                # Walk back to the source so callers can rebuild the path
+                while index is not None and world(index) not in target_parents:
+                    parent = parents[index]
+                    target_parents[world(index)] = None if parent is None else world(parent)
+                    index = parent
+        return target_costs, target_parents
+    
+    def _portal_edges(self, portal):
+        edges = self.portal_edges.get(portal)
+        if edges is None:
+            if self.search_budget is not None:
+                if self.search_budget <= 0:
+                    self.budget_exhausted = True
+                    raise _PlanBudgetExceeded()
+                self.search_budget -= 1
+            portals = self._portals(portal[0] // CHUNK_SIZE, portal[1] // CHUNK_SIZE)
+            costs, _ = self._search_chunk(portal, portals)
+            edges = {other: cost for other, cost in costs.items() if other != portal}
+            self.portal_edges[portal] = edges
+        return edges
+    
+    def find_route(self, start, goal):
+        """Plan an abstract route of world tiles from start to goal.
+
+        The route starts at start and lists the portals to pass through. When
+        the expansion or chunk budget runs out it ends at the explored node
+        closest to the goal instead, and later re-plans continue from there.
+        Returns None when no progress was possible.
+        """
+        start_chunk = (start[0] // CHUNK_SIZE, start[1] // CHUNK_SIZE)
+        goal_chunk = (goal[0] // CHUNK_SIZE, goal[1] // CHUNK_SIZE)
+        open_tiles = {start, goal}
+        
+        try:
+            start_portals = self._portals(*start_chunk)
+            start_edges, _ = self._search_chunk(start, start_portals + [goal], open_tiles)
+        except _PlanBudgetExceeded:
+            return None
+        try:
+            goal_edges, _ = self._search_chunk(goal, self._portals(*goal_chunk), open_tiles)
+        except _PlanBudgetExceeded:
+            goal_edges = {}  # Head towards the goal, a later plan connects it
+        
+        def heuristic(tile):
+            dx, dy = abs(tile[0] - goal[0]), abs(tile[1] - goal[1])
+            return (max(dx, dy) + 0.4142 * min(dx, dy)) * self.min_cost * self.heuristic_weight
+        
+        best = {start: 0.0}
+        parents = {start: None}
+        closest = start
+        heap = [(heuristic(start), 0.0, start)]
+        expansions = 0
+        while heap and expansions < self.max_expansions:
+            _, cost, node = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            if node == goal:
+                closest = goal
+                break
+            expansions += 1
+            if heuristic(node) < heuristic(closest):
+                closest = node
+            
+            if node == start:
+                edges = start_edges.items()
+            else:
+                try:
+                    edges = list(self._portal_edges(node).items())
+                    edges += [(link, self.tile_cost(link)) for link in self._links(node)]
+                except _PlanBudgetExceeded:
+                    break
+                if node in goal_edges:
+                    edges.append((goal, goal_edges[node]))
+            for next_node, edge_cost in edges:
+                next_cost = cost + edge_cost
+                if next_cost < best.get(next_node, math.inf):
+                    best[next_node] = next_cost
+                    parents[next_node] = node
+                    heapq.heappush(heap, (next_cost + heuristic(next_node), next_cost, next_node))
+        
+        if closest == start:
+            return None
+        route = []
+        node = closest
+        while node is not None:
+            route.append(node)
+            node = parents[node]
+        route.reverse()
+        return route
+    
+    def _chunk_path(self, start, end):
+        # Tile path inside one chunk, excluding start, with its cost
+        costs, parents = self._search_chunk(start, [end], {start, end})
+        if end not in costs:
+            return None, math.inf
+        path = []
+        tile = end
+        while tile != start:
+            path.append(tile)
+            tile = parents[tile]
+        path.reverse()
+        return path, costs[end]
+    
+    def refine(self, start, end):
+        """Tile path from start to a route node, excluding start.
+
+        end may lie in the next chunk over, then the path crosses the border
+        through the cheapest portal pair leading to it. Returns None when
+        end cannot be reached from start's chunk or the plan budget ran out.
+        """
+        start_chunk = (start[0] // CHUNK_SIZE, start[1] // CHUNK_SIZE)
+        end_chunk = (end[0] // CHUNK_SIZE, end[1] // CHUNK_SIZE)
+        try:
+            if start_chunk == end_chunk:
+                return self._chunk_path(start, end)[0]
+            
+            best_path, best_cost = None, math.inf
+            for link in self._links(end):
+                if (link[0] // CHUNK_SIZE, link[1] // CHUNK_SIZE) != start_chunk:
+                    continue
+                path, cost = self._chunk_path(start, link)
+                if path is not None and cost < best_cost:
+                    best_path, best_cost = path + [end], cost
+            return best_path
+        except _PlanBudgetExceeded:
+            return None
+
+class Autopilot:
+    """Flies a Plane along routes from a RoutePlanner.
+
+    Only the segment up to the next route node is refined to tiles, and
+    each segment is refined between consecutive route nodes, so following a
+    route never searches the abstract graph again. Re-plans reuse the cached
+    route from the first of its next nodes in or next to the plane's chunk;
+    a full search only runs when the plane has left the route, a partial
+    route ran out or the goal changed. Planning happens in update() with a
+    per-frame budget of new chunks and portal searches, so long routes are
+    built over several frames instead of stalling one.
+    """
+    def __init__(self, environment, planner=None, chunks_per_frame=1, searches_per_frame=3,
+                 replan_interval=1.0):
+        self.environment = environment
+        self.planner = planner or RoutePlanner(environment)
+        self.chunks_per_frame = chunks_per_frame
+        self.searches_per_frame = searches_per_frame
+        self.replan_interval = replan_interval  # Seconds between drift corrections
+        self.goal = None
+        self.route = []  # Remaining abstract route nodes, route[0] is the current target
+        self.path = []  # Tile waypoints up to and including route[0]
+        self.last_node = None  # Route node the current segment starts from
+        self.needs_plan = False
+        self.replan_timer = 0.0
+    
+    def engage(self, plane, goal):
+        self.disengage()
+        self.goal = goal
+        self.needs_plan = True  # Planned on the next update()
+    
+    def disengage(self):
+        self.goal = None
+        self.route = []
+        self.path = []
+        self.last_node = None
+        self.needs_plan = False
+    
+    def nearest_runway(self, plane, search_radius=8 * CHUNK_SIZE):
+        # The starting runway or any loaded airfield, whichever is closer
+        tile = plane_tile(plane)
+        runways = [self.environment.runway_center]
+        for feature in self.environment.features_near(tile[0], tile[1], search_radius):
+            if feature.kind == 'airfield':
+                runways.append((feature.world_x + 1, feature.world_y + 4))
+        return min(runways, key=lambda runway: math.hypot(runway[0] - tile[0], runway[1] - tile[1]))
+    
+    def replan(self, plane, reuse_lookahead=4):
+        if self.goal is None:
+            return
+        tile = plane_tile(plane)
+        chunk_x, chunk_y = tile[0] // CHUNK_SIZE, tile[1] // CHUNK_SIZE
+        
+        # Reuse the cached route from one of its next nodes near the plane
+        if not self.needs_plan:
+            for index, node in enumerate(self.route[:reuse_lookahead]):
+                if (abs(node[0] // CHUNK_SIZE - chunk_x) <= 1 and
+                        abs(node[1] // CHUNK_SIZE - chunk_y) <= 1):
+                    path = self.planner.refine(tile, node)
+                    if path is not None:
+                        self.route = self.route[index:]
+                        self.path = path
+                        self.last_node = tile
+                        return
+        
+        self.planner.budget_exhausted = False
+        route = self.planner.find_route(tile, self.goal)
+        if route is None:
+            if self.planner.budget_exhausted:
+                self.needs_plan = True  # Try again with next frame's budget
+                return
+            # Unreachable with these costs, fly straight at the goal
+            self.route = [self.goal]
+            self.path = [self.goal]
+            self.last_node = tile
+            self.needs_plan = False
+            return
+        self.route = route[1:]
+        self.last_node = tile
+        self.path = self.planner.refine(tile, self.route[0]) or [self.route[0]]
+        self.needs_plan = False
+    
+    def update(self, plane, dt, lookahead=4):
+        if self.goal is None:
+            return
+        self.planner.chunk_budget = self.chunks_per_frame
+        self.planner.search_budget = self.searches_per_frame
+        self.replan_timer -= dt
+        if self.needs_plan or self.replan_timer <= 0:
+            self.replan(plane)
+            self.replan_timer = self.replan_interval
+        tile = plane_tile(plane)
+        
+        # Waypoints inside the turning radius count as reached, otherwise a
+        # fast plane would circle around them
+        reached = max(1.5, plane.speed * 60 / math.pi / TILE_SIZE)
+        while True:
+            while self.path and math.hypot(self.path[0][0] - tile[0], self.path[0][1] - tile[1]) <= reached:
+                self.path.pop(0)
+            if self.path or not self.route:
+                break
+            # Reached the current route node, refine the segment to the next one
+            self.last_node = self.route.pop(0)
+            if not self.route:
+                break
+            path = self.planner.refine(self.last_node, self.route[0])
+            if path is None:
+                self.needs_plan = True  # Tiles changed under the route
+                break
+            self.path = path
+        
+        if not self.path:
+            if not self.route and not self.needs_plan:
+                if math.hypot(self.goal[0] - tile[0], self.goal[1] - tile[1]) <= reached:
+                    self.disengage()
+                else:
+                    self.needs_plan = True  # Partial route ran out before the goal
+            return
+        
+        # Steer towards a waypoint a little ahead for smoother turns
+        target = self.path[min(lookahead, len(self.path)) - 1]
+        target_x = (target[0] + 0.5) * TILE_SIZE
+        target_y = (target[1] + 0.5) * TILE_SIZE
+        desired = math.degrees(math.atan2(-(target_y - plane.world_y), target_x - plane.world_x))
+        turn = (desired - plane.angle + 180) % 360 - 180
+        max_turn = 180 * dt  # Same turn rate as manual control
+        plane.angle += max(-max_turn, min(max_turn, turn))
+    
+    def draw(self, surface, camera_x, camera_y):
+        points = self.path + self.route[1:]
+        if self.goal is None or not points:
+            return
+        points = [(surface.get_width() // 2, surface.get_height() // 2)] + [
+            (int((x + 0.5) * TILE_SIZE - camera_x), int((y + 0.5) * TILE_SIZE - camera_y))
+            for x, y in points]
+        pygame.draw.lines(surface, COLORS['route'], False, points, 2)
+
+class FrameCapture:
+    """Records frames without stalling the game loop.
+
+    Each frame's raw 32-bit pixels are copied into one of a fixed pool of
+    preallocated buffers and handed to a background thread, which converts
+    them to RGB and writes raw video or a PNG sequence. When the encoder
+    falls behind and no buffer is free, the frame is dropped and counted
+    instead of blocking. Frames that do not match the recording's size or
+    pixel format are skipped and counted separately.
+    """
+    def __init__(self, size, output_dir='captures', fmt='raw', pool_size=8):
+        if fmt not in ('raw', 'png'):
+            raise ValueError(f"Unknown capture format: {fmt!r}")
+        self.size = size
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.path = None
+        self.thread = None
+        self.frames_captured = 0
+        self.frames_written = 0
+        self.frames_dropped = 0  # Encoder fell behind
+        self.frames_skipped = 0  # Frame size or pixel format changed
+        
+        # Row-major 32-bit buffers, filled with a plain copy of the frame
+        width, height = size
+        self.free_buffers = queue.Queue()
+        for _ in range(pool_size):
+            self.free_buffers.put(np.empty((height, width), dtype=np.uint32))
+        self.pending = queue.Queue()
+    
+    def start(self):
+        width, height = self.size
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.fmt == 'raw':
+            # Convert with: ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r 60 -i <file> out.mp4
+            self.path = os.path.join(self.output_dir, f"capture-{stamp}-{width}x{height}.rgb")
+        else:
+            self.path = os.path.join(self.output_dir, f"capture-{stamp}")
+            os.makedirs(self.path, exist_ok=True)
+        self.thread = Thread(target=self._encode, daemon=True)
+        self.thread.start()
+    
+    def capture(self, surface):
+        # Called once per frame on the main thread, never waits on the encoder
+        if surface.get_size() != self.size or surface.get_bytesize() != 4:
+            self.frames_skipped += 1
+            return False
+        try:
+            buffer = self.free_buffers.get_nowait()
+        except queue.Empty:
+            self.frames_dropped += 1
+            return False
+        np.copyto(buffer, pygame.surfarray.pixels2d(surface).T)
+        self.pending.put((self.frames_captured, buffer, surface.get_shifts()[:3]))
+        self.frames_captured += 1
+        return True
+    
+    def stop(self):
+        # Let the encoder finish every frame already captured
+        self.pending.put(None)
+        self.thread.join()
+        self.thread = None
+    
+    def _encode(self):
+        width, height = self.size
+        rgb = np.empty((height, width, 3), dtype=np.uint8)
+        channel = np.empty((height, width), dtype=np.uint32)
+        video = open(self.path, 'wb') if self.fmt == 'raw' else None
+        try:
+            while True:
+                item = self.pending.get()
+                if item is None:
+                    break
+                index, buffer, shifts = item
+                for component, shift in enumerate(shifts):
+                    np.right_shift(buffer, shift, out=channel)
+                    rgb[..., component] = channel
+                self.free_buffers.put(buffer)
+                
+                if video is not None:
+                    video.write(rgb)
+                else:
+                    image = pygame.image.frombuffer(rgb, self.size, 'RGB')
+                    pygame.image.save(image, os.path.join(self.path, f"frame-{index:06d}.png"))
+                self.frames_written += 1
+        finally:
+            if video is not None:
+                video.close()
+
 def toggle_fullscreen():
     global screen, is_fullscreen, SCREEN_WIDTH, SCREEN_HEIGHT
     is_fullscreen = not is_fullscreen
@@ -275,9 +1570,27 @@ def handle_resize(event):
         SCREEN_WIDTH = event.w
         SCREEN_HEIGHT = event.h
 
+def stop_capture(capture):
+    capture.stop()
+    print(f"Saved {capture.frames_written} frames to {capture.path} "
+          f"({capture.frames_dropped} dropped, {capture.frames_skipped} skipped)")
+
 def main():
+    global screen
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Top-Down Plane Simulator")
+    
     plane = Plane()
     environment = Environment()
+    
+    # Optional health exporters, cheap enough to leave running
+    if os.environ.get('PLANE_METRICS_PORT'):
+        serve_metrics(environment, int(os.environ['PLANE_METRICS_PORT']))
+    if os.environ.get('PLANE_METRICS_FILE'):
+        log_metrics(environment, os.environ['PLANE_METRICS_FILE'])
+    
+    autopilot = Autopilot(environment)
+    capture = None
     running = True
     last_frame = pygame.time.get_ticks()
     
@@ -285,6 +1598,7 @@ def main():
         current_frame = pygame.time.get_ticks()
         dt = (current_frame - last_frame) / 1000.0
         last_frame = current_frame
+        metrics.observe_frame(dt)
         
         # Event handling
         for event in pygame.event.get():
@@ -295,11 +1609,28 @@ def main():
                     toggle_fullscreen()
                 elif event.key == pygame.K_ESCAPE and is_fullscreen:
                     toggle_fullscreen()
+                elif event.key == pygame.K_F9:
+                    if capture is None:
+                        capture = FrameCapture(screen.get_size())
+                        capture.start()
+                    else:
+                        stop_capture(capture)
+                        capture = None
+                elif event.key == pygame.K_t:
+                    environment.tile_compositing = not environment.tile_compositing
+                elif event.key == pygame.K_r:
+                    autopilot.engage(plane, autopilot.nearest_runway(plane))
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                # Click to fly to a waypoint
+                autopilot.engage(plane, (int((plane.world_x + event.pos[0] - screen.get_width()//2) // TILE_SIZE),
+                                         int((plane.world_y + event.pos[1] - screen.get_height()//2) // TILE_SIZE)))
             elif event.type == pygame.VIDEORESIZE and not is_fullscreen:
                 handle_resize(event)
         
         # Handle continuous key presses with smooth acceleration
         keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]:
+            autopilot.disengage()  # Manual steering takes over
         if keys[pygame.K_LEFT]:
             plane.angle += 180 * dt  # 180 degrees per second
         if keys[pygame.K_RIGHT]:
@@ -309,6 +1640,9 @@ def main():
         if keys[pygame.K_DOWN]:
             plane.speed = max(plane.speed - 12 * dt, 1)
         
+        # Let the autopilot steer; it re-plans once a second to correct drift
+        autopilot.update(plane, dt)
+        
         # Update plane position
         plane.move()
         
@@ -320,13 +1654,28 @@ def main():
                         int(plane.world_x - screen.get_width()//2), 
                         int(plane.world_y - screen.get_height()//2))
         
+        autopilot.draw(screen,
+                       int(plane.world_x - screen.get_width()//2),
+                       int(plane.world_y - screen.get_height()//2))
+        
         # Draw plane (centered on screen)
         plane.draw(screen, plane.world_x, plane.world_y)
         
+        # Hand the finished frame to the recorder
+        if capture is not None:
+            if screen.get_size() != capture.size:
+                # Resized or toggled fullscreen: finish this file, start a new one
+                stop_capture(capture)
+                capture = FrameCapture(screen.get_size())
+                capture.start()
+            capture.capture(screen)
+        
         # Update display
         pygame.display.flip()
         clock.tick(60)
 
+    if capture is not None:
+        stop_capture(capture)
     pygame.quit()
 
 if __name__ == "__main__":